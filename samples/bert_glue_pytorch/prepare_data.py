@@ -15,7 +15,7 @@ tos_client = tos.TOSClient()
 print("start download glue_data ...")
 tmp_file_path = CACHE_DIR.subpath("glue_data.tar.gz")
 tos_client.download_file(
-    bucket=constant.get_public_examples_readonly_bucket(),
+    bucket=constant.PUBLIC_EXAMPLES_TOS_BUCKET,
     key="bert/glue/glue_data.tar.gz",
     target_file_path=tmp_file_path,
 )
@@ -29,7 +29,7 @@ print("start download bert model ...")
 BERT_BASE_MODEL = "bert-base-uncased"
 tmp_file_path = CACHE_DIR.subpath(f"{BERT_BASE_MODEL}.tar.gz")
 tos_client.download_file(
-    bucket=constant.get_public_examples_readonly_bucket(),
+    bucket=constant.PUBLIC_EXAMPLES_TOS_BUCKET,
     key=f"bert/model/{BERT_BASE_MODEL}.tar.gz",
     target_file_path=tmp_file_path,
 )
@@ -39,7 +39,7 @@ except ImportError:
     amp = None
 
 volcengine_ml_platform.init()
-BUCKET = constant.get_public_examples_readonly_bucket()
+BUCKET = constant.PUBLIC_EXAMPLES_TOS_BUCKET
 USER_BUCKET = "mlplatform-public-examples-cn-beijing"
 
 
@@ -13,7 +13,7 @@ from volcengine_ml_platform.io import tos
 from volcengine_ml_platform.util import cache_dir
 from volcengine_ml_platform.util import metric
 
-BUCKET = constant.get_public_examples_readonly_bucket()
+BUCKET = constant.PUBLIC_EXAMPLES_TOS_BUCKET
 USER_BUCKET = "mlplatform-public-examples-cn-beijing"
 CACHE_DIR = cache_dir.create(
     "flower_classification/swin_transformer_tf_horovod",
@@ -18,7 +18,7 @@ warnings.filterwarnings(action="ignore", category=UserWarning)
 
 volcengine_ml_platform.init()
 client = tos.TOSClient()
-BUCKET = constant.get_public_examples_readonly_bucket()
+BUCKET = constant.PUBLIC_EXAMPLES_TOS_BUCKET
 CACHE_DIR = cache_dir.create("price_prediction/xgboost")
 
 zero_list = [
@@ -19,7 +19,7 @@ from volcengine_ml_platform import constant
 
 volcengine_ml_platform.init()
 
-DATA_PATH = f"s3://{constant.get_public_examples_readonly_bucket()}/chinese-mnist/data"
+DATA_PATH = f"s3://{constant.PUBLIC_EXAMPLES_TOS_BUCKET}/chinese-mnist/data"
 BATCH_SIZE = 32
 train_length = 14000
 test_length = 1000
@@ -65,7 +65,7 @@ from volcengine_ml_platform import constant
 # from image_classification.utils import should_backup_checkpoint
 
 
-BUCKET = constant.get_public_examples_readonly_bucket()
+BUCKET = constant.PUBLIC_EXAMPLES_TOS_BUCKET
 
 
 def available_models():
@@ -11,7 +11,7 @@ from volcengine_ml_platform import constant
 volcengine_ml_platform.init()
 
 
-BUCKET = constant.get_public_examples_readonly_bucket()
+BUCKET = constant.PUBLIC_EXAMPLES_TOS_BUCKET
 
 DATASET_PATH = "s3://{}/imagenet/tfrecord".format(
     BUCKET,
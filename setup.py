@@ -21,7 +21,8 @@ install_requires = [
 ]
 
 pytorch_requires = ["torch==1.8.0"]
-full_requires = list(set(pytorch_requires))
+fast_requires = ["jpeg4py>=0.1.4", "orjson>=3.6.0", "pyarrow>=1.0.0"]
+full_requires = list(set(pytorch_requires + fast_requires))
 
 package_root = os.path.abspath(os.path.dirname(__file__))
 readme_filename = os.path.join(package_root, "README.md")
@@ -52,6 +53,7 @@ setuptools.setup(
     extras_require={
         "full": full_requires,
         "pytorch": pytorch_requires,
+        "fast": fast_requires,
     },
     python_requires=">=3.6",
     scripts=[],
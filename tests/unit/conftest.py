@@ -0,0 +1,15 @@
+import pytest
+
+from volcengine_ml_platform.io import tos
+from volcengine_ml_platform.openapi import dataset_client
+
+
+@pytest.fixture
+def offline_clients(monkeypatch):
+    """datasets built from local files never reach TOS or the OpenAPI"""
+    monkeypatch.setattr(tos, "TOSClient", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        dataset_client,
+        "DataSetClient",
+        lambda *args, **kwargs: None,
+    )
@@ -0,0 +1,76 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from volcengine_ml_platform.io.cuda_prefetcher import CudaPrefetcher  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    not torch.cuda.is_available(),
+    reason="CUDA is not available",
+)
+
+MEAN = (0.485, 0.456, 0.406)
+STD = (0.229, 0.224, 0.225)
+
+
+def uint8_batches(count=3, batch_size=2):
+    generator = torch.Generator().manual_seed(0)
+    return [
+        (
+            torch.randint(
+                0,
+                256,
+                (batch_size, 3, 4, 5),
+                dtype=torch.uint8,
+                generator=generator,
+            ).pin_memory(),
+            torch.arange(batch_size, dtype=torch.int64) + i,
+        )
+        for i in range(count)
+    ]
+
+
+def test_normalize_on_device():
+    batches = uint8_batches()
+    mean = torch.tensor(MEAN).view(1, -1, 1, 1)
+    std = torch.tensor(STD).view(1, -1, 1, 1)
+    outputs = list(CudaPrefetcher(batches, MEAN, STD))
+    assert len(outputs) == len(batches)
+    for (x, y), (image, target) in zip(batches, outputs):
+        assert image.is_cuda and image.dtype == torch.float32
+        expected = (x.float() - mean * 255) / (std * 255)
+        torch.testing.assert_close(image.cpu(), expected)
+        assert torch.equal(target.cpu(), y)
+
+
+def test_without_normalize_on_device():
+    batches = uint8_batches()
+    outputs = list(CudaPrefetcher(batches, normalize_on_device=False))
+    assert len(outputs) == len(batches)
+    for (x, y), (image, target) in zip(batches, outputs):
+        assert image.is_cuda and image.dtype == torch.uint8
+        assert torch.equal(image.cpu(), x)
+        assert torch.equal(target.cpu(), y)
+
+
+@pytest.mark.parametrize("mean, std", [(None, STD), (MEAN, None), (None, None)])
+def test_normalize_requires_mean_and_std(mean, std):
+    with pytest.raises(ValueError):
+        CudaPrefetcher(uint8_batches(), mean, std)
+
+
+def test_iterates_every_epoch():
+    batches = uint8_batches()
+    prefetcher = CudaPrefetcher(batches, MEAN, STD)
+    assert len(prefetcher) == len(batches)
+    iterator = iter(prefetcher)
+    for _ in batches:
+        next(iterator)
+    with pytest.raises(StopIteration):
+        next(iterator)
+    # a new epoch starts over from the first batch
+    for epoch in range(2):
+        targets = [target.cpu() for _, target in prefetcher]
+        assert len(targets) == len(batches)
+        for (_, y), target in zip(batches, targets):
+            assert torch.equal(target, y)
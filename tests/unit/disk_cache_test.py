@@ -0,0 +1,97 @@
+import os
+import time
+import uuid
+
+import pytest
+
+from volcengine_ml_platform.io import disk_cache
+from volcengine_ml_platform.io.disk_cache import DiskCache
+
+
+def cached_files(cache):
+    return sorted(name for _, _, names in os.walk(cache.root) for name in names)
+
+
+def test_put_get(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    assert cache.get("bucket", "key") is None
+    cache.put("bucket", "key", b"data")
+    assert cache.get("bucket", "key") == b"data"
+    assert cache.get("bucket", "other") is None
+    # the temporary file is renamed into place
+    assert not [name for name in cached_files(cache) if name.endswith(".tmp")]
+
+
+def test_put_failure_leaves_no_files(tmp_path, monkeypatch):
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(disk_cache.os, "replace", fail_replace)
+    cache = DiskCache(str(tmp_path))
+    cache.put("bucket", "key", b"data")
+    assert cached_files(cache) == []
+    assert cache.get("bucket", "key") is None
+
+
+def test_get_read_error_is_a_miss(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    # reading a directory raises IsADirectoryError rather than FileNotFoundError
+    os.makedirs(cache._path("bucket", "key"))
+    assert cache.get("bucket", "key") is None
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    now = time.time()
+    for i in range(5):
+        cache.put("bucket", str(i), b"x" * 300)
+        path = cache._path("bucket", str(i))
+        os.utime(path, (now - 100 + i, now - 100 + i))
+    cache.evict()
+    # 1500 bytes shrink to at most EVICT_TARGET_RATIO * 1000, oldest first
+    kept = [i for i in range(5) if os.path.exists(cache._path("bucket", str(i)))]
+    assert kept == [2, 3, 4]
+    assert 300 * len(kept) <= cache.max_bytes * disk_cache.EVICT_TARGET_RATIO
+
+
+def test_evict_within_limit(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    for i in range(3):
+        cache.put("bucket", str(i), b"x" * 300)
+    cache.evict()
+    assert all(cache.get("bucket", str(i)) for i in range(3))
+
+
+@pytest.mark.parametrize("age, removed", [(0, False), (2, True)])
+def test_evict_stale_tmp_files(tmp_path, age, removed):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    cache.put("bucket", "key", b"data")
+    tmp_file = f"{cache._path('bucket', 'key')}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(b"partial")
+    mtime = time.time() - age * disk_cache.STALE_TMP_SECONDS
+    os.utime(tmp_file, (mtime, mtime))
+    cache.evict()
+    assert os.path.exists(tmp_file) != removed
+    assert cache.get("bucket", "key") == b"data"
+
+
+def test_evict_keeps_foreign_files(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=600)
+    cached_path = cache._path("bucket", "key")
+    foreign_paths = [
+        tmp_path / "notes.txt",
+        tmp_path / "projects" / "notes.txt",
+        # inside a cache subdirectory but not named like a cache entry
+        tmp_path / os.path.basename(os.path.dirname(cached_path)) / "notes.txt",
+        tmp_path / "projects" / os.path.basename(cached_path),
+    ]
+    for path in foreign_paths:
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b"x" * 1000)
+        # older than any cache entry and stale if it were a temporary file
+        os.utime(path, (0, 0))
+    cache.put("bucket", "key", b"x" * 1000)
+    cache.evict()
+    assert all(path.exists() for path in foreign_paths)
+    assert not os.path.exists(cached_path)
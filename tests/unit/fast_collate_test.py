@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from volcengine_ml_platform.io.fast_collate import fast_collate  # noqa: E402
+
+
+def hwc_image(value, height=4, width=3):
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    image[:, :, 0] = value
+    image[:, :, 1] = value + 1
+    image[:, :, 2] = value + 2
+    return image
+
+
+def test_hwc_to_chw():
+    batch = [(hwc_image(i * 10), i) for i in range(2)]
+    tensor, targets = fast_collate(batch)
+    assert tensor.dtype == torch.uint8
+    assert tensor.shape == (2, 3, 4, 3)
+    for i, (image, _) in enumerate(batch):
+        assert torch.equal(tensor[i], torch.from_numpy(image).permute(2, 0, 1))
+        assert tensor[i, 2, 0, 0] == i * 10 + 2
+    assert targets.dtype == torch.int64
+    assert targets.tolist() == [0, 1]
+
+
+def test_grayscale_gets_channel_axis():
+    batch = [(np.full((4, 3), 7, dtype=np.uint8), 5)]
+    tensor, targets = fast_collate(batch)
+    assert tensor.shape == (1, 1, 4, 3)
+    assert tensor.sum() == 7 * 12
+    assert targets.tolist() == [5]
+
+
+def test_chw_tensor_passthrough():
+    images = [torch.full((3, 4, 3), i, dtype=torch.uint8) for i in range(2)]
+    tensor, targets = fast_collate([(image, 1) for image in images])
+    assert tensor.shape == (2, 3, 4, 3)
+    assert torch.equal(tensor, torch.stack(images))
+    assert targets.tolist() == [1, 1]
+
+
+def test_tuple_deinterleaves_by_position():
+    # two views per sample, e.g. the augmentation splits of timm
+    batch = [((hwc_image(i), hwc_image(100 + i)), i) for i in range(3)]
+    tensor, targets = fast_collate(batch)
+    assert tensor.shape == (6, 3, 4, 3)
+    first_views, second_views = torch.split(tensor, 3)
+    assert first_views[:, 0, 0, 0].tolist() == [0, 1, 2]
+    assert second_views[:, 0, 0, 0].tolist() == [100, 101, 102]
+    assert targets.tolist() == [0, 1, 2, 0, 1, 2]
+
+
+def test_unsupported_sample_type():
+    with pytest.raises(TypeError):
+        fast_collate([("not an image", 0)])
@@ -0,0 +1,113 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip("torch")
+
+from volcengine_ml_platform.datasets import image_dataset  # noqa: E402
+from volcengine_ml_platform.datasets.image_dataset import ImageDataset  # noqa: E402
+
+
+@pytest.fixture
+def local_dataset(tmp_path, offline_clients):
+    return ImageDataset(local_path=str(tmp_path))
+
+
+def write_manifest(path, lines):
+    with open(path, "w") as f:
+        for line in lines:
+            f.write(json.dumps(line))
+            f.write("\n")
+
+
+def write_images(local_dataset, shapes):
+    lines = []
+    for i, shape in enumerate(shapes):
+        file_path = os.path.join(local_dataset.local_path, f"{i}.png")
+        Image.fromarray(np.full(shape, i, dtype=np.uint8)).save(file_path)
+        lines.append({"Data": {"FilePath": file_path}, "Annotation": i})
+    write_manifest(local_dataset._manifest_path(), lines)
+
+
+@pytest.mark.parametrize(
+    "url, bucket, key",
+    [
+        ("tos://bucket/key.jpg", "bucket", "key.jpg"),
+        ("tos://bucket/dir/sub/key.jpg", "bucket", "dir/sub/key.jpg"),
+        ("https://bucket/dir/", "bucket", "dir/"),
+    ],
+)
+def test_url_re(url, bucket, key):
+    assert image_dataset._URL_RE.search(url).group(1, 2) == (bucket, key)
+
+
+@pytest.mark.parametrize("url", ["bucket/key.jpg", "tos://bucket"])
+def test_url_re_rejects(url):
+    assert image_dataset._URL_RE.search(url) is None
+
+
+def test_parse_image_manifest(local_dataset, tmp_path):
+    manifest_path = tmp_path / "manifest"
+    write_manifest(
+        manifest_path,
+        [
+            {"Data": {"ImageURL": f"tos://bucket/images/{i}.jpg"}, "Annotation": i}
+            for i in range(3)
+        ],
+    )
+    manifest_info = local_dataset.parse_image_manifest(str(manifest_path))
+    assert manifest_info["buckets"] == ["bucket"] * 3
+    assert manifest_info["keys"] == [f"images/{i}.jpg" for i in range(3)]
+    assert manifest_info["annotations"] == [0, 1, 2]
+    # buckets are interned so every row shares one string
+    assert manifest_info["buckets"][0] is manifest_info["buckets"][2]
+
+
+def test_parse_image_manifest_invalid_url(local_dataset, tmp_path):
+    manifest_path = tmp_path / "manifest"
+    write_manifest(
+        manifest_path,
+        [{"Data": {"ImageURL": "bucket/key.jpg"}, "Annotation": 0}],
+    )
+    with pytest.raises(ValueError):
+        local_dataset.parse_image_manifest(str(manifest_path))
+
+
+def test_load_as_np(local_dataset):
+    write_images(local_dataset, [(4, 3, 3)] * 4)
+    images, annotations = local_dataset.load_as_np()
+    assert images.shape == (4, 4, 3, 3)
+    assert images.dtype == np.uint8
+    assert images[:, 0, 0, 0].tolist() == [0, 1, 2, 3]
+    assert annotations == [0, 1, 2, 3]
+
+
+def test_load_as_np_offset_limit(local_dataset):
+    write_images(local_dataset, [(4, 3, 3)] * 4)
+    images, annotations = local_dataset.load_as_np(offset=1, limit=2)
+    assert images.shape == (2, 4, 3, 3)
+    assert images[:, 0, 0, 0].tolist() == [1, 2]
+    assert annotations == [1, 2]
+
+
+def test_load_as_np_mixed_shapes(local_dataset):
+    shapes = [(4, 3, 3), (4, 3, 3), (5, 2, 3)]
+    write_images(local_dataset, shapes)
+    images, annotations = local_dataset.load_as_np()
+    # images of different shapes fall back to an object array
+    assert len(images) == 3
+    assert [image.shape for image in images] == shapes
+    assert [image[0, 0, 0] for image in images] == [0, 1, 2]
+    # images decoded before the mismatch do not keep the preallocated buffer alive
+    assert images[0].base is None and images[1].base is None
+    assert annotations == [0, 1, 2]
+
+
+def test_load_as_np_empty(local_dataset):
+    write_manifest(local_dataset._manifest_path(), [])
+    images, annotations = local_dataset.load_as_np()
+    assert images.size == 0
+    assert annotations == []
@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from volcengine_ml_platform.util import json_util
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(json_util, "orjson", None)
+    elif json_util.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_round_trip(backend):
+    document = {"Data": {"FilePath": "图片/0.jpg"}, "Id": 1, "Score": 0.5}
+    data = json_util.dumps(document)
+    assert isinstance(data, bytes)
+    assert json_util.loads(data) == document
+    assert json_util.loads(data.decode("utf-8")) == document
+
+
+def test_non_finite_constants_round_trip(backend):
+    data = b'{"a":NaN,"b":Infinity,"c":-Infinity}'
+    document = json_util.loads(data)
+    assert math.isnan(document["a"])
+    assert document["b"] == math.inf and document["c"] == -math.inf
+    assert json_util.dumps(document) == data
+
+
+def test_dumps_integers_beyond_64_bit(backend):
+    document = {"a": 123456789012345678901234567890}
+    assert json_util.dumps(document) == b'{"a":123456789012345678901234567890}'
+
+
+def test_loads_integers_beyond_64_bit_with_json(monkeypatch):
+    monkeypatch.setattr(json_util, "orjson", None)
+    data = b'{"a":123456789012345678901234567890}'
+    assert json_util.loads(data) == {"a": 123456789012345678901234567890}
+
+
+def test_loads_invalid(backend):
+    with pytest.raises(ValueError):
+        json_util.loads(b'{"a":')
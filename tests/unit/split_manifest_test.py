@@ -0,0 +1,118 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from volcengine_ml_platform import constant
+from volcengine_ml_platform.datasets import dataset
+from volcengine_ml_platform.datasets.text_dataset import TextDataset
+
+
+@pytest.fixture
+def source_dataset(tmp_path, offline_clients):
+    source_dir = tmp_path / "source"
+    (source_dir / "data").mkdir(parents=True)
+    with open(source_dir / constant.DATASET_LOCAL_METADATA_FILENAME, "w") as f:
+        for i in range(10):
+            file_path = source_dir / "data" / f"{i}.txt"
+            file_path.write_text(str(i))
+            f.write(json.dumps({"Data": {"FilePath": str(file_path)}, "Id": i}))
+            f.write("\n")
+    source = TextDataset(local_path=str(source_dir))
+    source.created = True
+    return source
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, constant.DATASET_LOCAL_METADATA_FILENAME)) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_split_manifest_keeps_order(source_dataset, tmp_path, monkeypatch):
+    # a shallow pipeline forces writes while lines are still being parsed
+    monkeypatch.setattr(dataset, "SPLIT_PIPELINE_DEPTH", 2)
+    training_dir = tmp_path / "train"
+    testing_dir = tmp_path / "test"
+    training_dir.mkdir()
+    testing_dir.mkdir()
+    is_test = np.zeros(10, dtype=np.bool_)
+    is_test[[1, 5, 6]] = True
+
+    source_dataset._split_manifest(str(training_dir), str(testing_dir), is_test)
+
+    training_lines = read_manifest(training_dir)
+    testing_lines = read_manifest(testing_dir)
+    assert [line["Id"] for line in training_lines] == [0, 2, 3, 4, 7, 8, 9]
+    assert [line["Id"] for line in testing_lines] == [1, 5, 6]
+    splits = ((training_dir, training_lines), (testing_dir, testing_lines))
+    for directory, lines in splits:
+        for line in lines:
+            file_path = line["Data"]["FilePath"]
+            assert file_path.startswith(str(directory))
+            with open(file_path) as f:
+                assert f.read() == str(line["Id"])
+
+
+def test_split_manifest_lines_past_mask_are_training(
+    source_dataset,
+    tmp_path,
+):
+    training_dir = tmp_path / "train"
+    testing_dir = tmp_path / "test"
+    training_dir.mkdir()
+    testing_dir.mkdir()
+    is_test = np.array([True, False, True], dtype=np.bool_)
+
+    source_dataset._split_manifest(str(training_dir), str(testing_dir), is_test)
+
+    training_ids = [line["Id"] for line in read_manifest(training_dir)]
+    assert [line["Id"] for line in read_manifest(testing_dir)] == [0, 2]
+    assert training_ids == [1] + list(range(3, 10))
+
+
+def test_split_manifest_raises_copy_errors(source_dataset, tmp_path, monkeypatch):
+    def failing_copy(metadata, source_dir, destination_dir):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(dataset, "dataset_copy_file", failing_copy)
+    training_dir = tmp_path / "train"
+    testing_dir = tmp_path / "test"
+    training_dir.mkdir()
+    testing_dir.mkdir()
+
+    with pytest.raises(OSError, match="disk full"):
+        source_dataset._split_manifest(
+            str(training_dir),
+            str(testing_dir),
+            np.zeros(10, dtype=np.bool_),
+        )
+
+
+def test_split(source_dataset, tmp_path):
+    source_dataset.data_count = 10
+    train, test = source_dataset.split(
+        str(tmp_path / "train"),
+        str(tmp_path / "test"),
+        ratio=0.5,
+    )
+
+    assert train.created and test.created
+    assert (train.data_count, test.data_count) == (5, 5)
+    training_ids = [line["Id"] for line in read_manifest(tmp_path / "train")]
+    testing_ids = [line["Id"] for line in read_manifest(tmp_path / "test")]
+    assert len(training_ids) == 5 and len(testing_ids) == 5
+    assert sorted(training_ids + testing_ids) == list(range(10))
+
+
+def test_manifest_writer_flushes_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset, "MANIFEST_FLUSH_LINES", 2)
+    manifest_path = tmp_path / "manifest"
+    with dataset.ManifestWriter(str(manifest_path)) as writer:
+        writer.write({"Id": 0})
+        assert len(writer._buffer) > 0
+        writer.write({"Id": 1})
+        assert len(writer._buffer) == 0
+        writer.write({"Id": 2})
+    with open(manifest_path, "rb") as f:
+        assert [json.loads(line) for line in f] == [{"Id": 0}, {"Id": 1}, {"Id": 2}]
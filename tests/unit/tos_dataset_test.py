@@ -0,0 +1,343 @@
+import io
+import pickle
+import threading
+import types
+import warnings
+from collections import Counter
+
+import numpy as np
+import pytest
+from PIL import Image
+
+torch = pytest.importorskip("torch")
+
+from volcengine_ml_platform.io import tos_dataset  # noqa: E402
+from volcengine_ml_platform.io.fast_collate import fast_collate  # noqa: E402
+from volcengine_ml_platform.io.tos_dataset import PrefetchSampler  # noqa: E402
+from volcengine_ml_platform.io.tos_dataset import TorchTOSDataset  # noqa: E402
+
+DATASET_SIZE = 20
+
+
+class FakeTOSClient:
+    """serves ``bucket/key`` as the content of every object and counts requests"""
+
+    def __init__(self, *args, **kwargs):
+        self.requests = Counter()
+        self.fail_once = set()
+        self._lock = threading.Lock()
+
+    def get_object(self, bucket, key):
+        with self._lock:
+            self.requests[key] += 1
+            if key in self.fail_once:
+                self.fail_once.remove(key)
+                raise OSError(f"failed to get {bucket}/{key}")
+        return io.BytesIO(f"{bucket}/{key}".encode("utf-8"))
+
+
+def decode(data):
+    return data.decode("utf-8")
+
+
+def target_transform(annotation):
+    return annotation
+
+
+@pytest.fixture
+def tos_client(monkeypatch):
+    client = FakeTOSClient()
+    monkeypatch.setattr(tos_dataset.tos, "TOSClient", lambda *args, **kwargs: client)
+    return client
+
+
+def manifest_info():
+    return {
+        "buckets": ["bucket"] * DATASET_SIZE,
+        "keys": [str(i) for i in range(DATASET_SIZE)],
+        "annotations": list(range(DATASET_SIZE)),
+    }
+
+
+@pytest.fixture
+def torch_dataset(tos_client):
+    return TorchTOSDataset(
+        manifest_info(),
+        decode=decode,
+        target_transform=target_transform,
+    )
+
+
+def sample(index):
+    return f"bucket/{index}", index
+
+
+def prefetched_keys(torch_dataset):
+    # wait for every queued object before looking at the cache
+    torch_dataset._prefetch_queue.join()
+    return [key for _, key in torch_dataset._prefetch_cache]
+
+
+def test_prefetch_fetches_every_object_once_per_epoch(torch_dataset, tos_client):
+    sampler = PrefetchSampler(torch.utils.data.SequentialSampler(torch_dataset))
+    torch_dataset.set_prefetch_sampler(sampler, prefetch_size=4)
+    for epoch in range(1, 3):
+        for index in sampler:
+            assert torch_dataset[index] == sample(index)
+            prefetched_keys(torch_dataset)
+        assert tos_client.requests == {str(i): epoch for i in range(DATASET_SIZE)}
+
+
+def test_prefetch_follows_sampler_order(torch_dataset):
+    order = [5, 3, 17, 0, 11, 8, 2]
+    sampler = PrefetchSampler(order)
+    torch_dataset.set_prefetch_sampler(sampler, prefetch_size=4)
+    samples = iter(sampler)
+    torch_dataset[next(samples)]
+    assert prefetched_keys(torch_dataset) == ["3", "17", "0", "11"]
+
+
+def test_prefetch_restarts_with_new_epoch(torch_dataset):
+    sampler = PrefetchSampler(torch.utils.data.SequentialSampler(torch_dataset))
+    torch_dataset.set_prefetch_sampler(sampler, prefetch_size=4)
+    samples = iter(sampler)
+    for _ in range(10):
+        torch_dataset[next(samples)]
+    assert prefetched_keys(torch_dataset) == ["10", "11", "12", "13"]
+    # the next epoch starts before the previous one was consumed
+    samples = iter(sampler)
+    assert torch_dataset[next(samples)] == sample(0)
+    assert prefetched_keys(torch_dataset) == ["1", "2", "3", "4"]
+
+
+def test_failed_prefetch_falls_back_to_direct_fetch(torch_dataset, tos_client):
+    tos_client.fail_once.add("2")
+    sampler = PrefetchSampler(torch.utils.data.SequentialSampler(torch_dataset))
+    torch_dataset.set_prefetch_sampler(sampler, prefetch_size=4)
+    for index in sampler:
+        assert torch_dataset[index] == sample(index)
+        prefetched_keys(torch_dataset)
+    assert tos_client.requests["2"] == 2
+    assert sum(tos_client.requests.values()) == DATASET_SIZE + 1
+
+
+def test_prefetch_cache_stays_within_prefetch_size(torch_dataset):
+    sampler = PrefetchSampler(torch.utils.data.RandomSampler(torch_dataset))
+    torch_dataset.set_prefetch_sampler(sampler, prefetch_size=4)
+    # abandoned epochs leave their prefetched objects behind
+    for _ in range(5):
+        samples = iter(sampler)
+        for _ in range(3):
+            torch_dataset[next(samples)]
+            assert len(prefetched_keys(torch_dataset)) <= 4
+
+
+def test_prefetch_with_concurrent_batches(torch_dataset, tos_client):
+    sampler = PrefetchSampler(torch.utils.data.SequentialSampler(torch_dataset))
+    torch_dataset.set_prefetch_sampler(sampler, prefetch_size=8)
+    samples = iter(sampler)
+    for _ in range(DATASET_SIZE // 4):
+        batch = [next(samples) for _ in range(4)]
+        assert torch_dataset.__getitems__(batch) == [sample(i) for i in batch]
+    # fetch threads may race the prefetch thread, but every object is read
+    assert set(tos_client.requests) == {str(i) for i in range(DATASET_SIZE)}
+
+
+def test_no_resources_before_first_access(monkeypatch):
+    def unexpected_client(*args, **kwargs):
+        raise AssertionError("TOSClient created in the parent process")
+
+    monkeypatch.setattr(tos_dataset.tos, "TOSClient", unexpected_client)
+    torch_dataset = TorchTOSDataset(
+        {"buckets": ["bucket"], "keys": ["0"], "annotations": [0]},
+    )
+    assert len(torch_dataset) == 1
+    assert not hasattr(torch_dataset, "tos_client")
+
+
+def test_resources_recreated_after_pid_change(torch_dataset, monkeypatch):
+    clients = []
+
+    def new_client(*args, **kwargs):
+        clients.append(FakeTOSClient())
+        return clients[-1]
+
+    monkeypatch.setattr(tos_dataset.tos, "TOSClient", new_client)
+    assert torch_dataset[0] == sample(0)
+    pool = torch_dataset._pool
+    assert torch_dataset[1] == sample(1)
+    assert len(clients) == 1 and torch_dataset._pool is pool
+    # as seen by a forked DataLoader worker
+    pid = tos_dataset.os.getpid()
+    monkeypatch.setattr(tos_dataset.os, "getpid", lambda: pid + 1)
+    assert torch_dataset[2] == sample(2)
+    assert len(clients) == 2 and torch_dataset._pool is not pool
+    assert torch_dataset.tos_client is clients[1]
+    assert clients[1].requests == {"2": 1}
+
+
+def test_pickle_drops_process_local_state(torch_dataset):
+    sampler = PrefetchSampler(torch.utils.data.SequentialSampler(torch_dataset))
+    torch_dataset.set_prefetch_sampler(sampler, prefetch_size=4)
+    samples = iter(sampler)
+    torch_dataset[next(samples)]
+    prefetched_keys(torch_dataset)
+    state = torch_dataset.__getstate__()
+    for name in state:
+        assert name not in tos_dataset.PROCESS_LOCAL_ATTRS
+        assert not name.startswith("_prefetch_")
+    clone = pickle.loads(pickle.dumps(torch_dataset))
+    assert clone._pid is None
+    assert clone[1] == sample(1)
+    assert clone._pool is not torch_dataset._pool
+
+
+def test_data_loader_workers(torch_dataset):
+    loader = torch.utils.data.DataLoader(
+        torch_dataset,
+        batch_size=4,
+        num_workers=2,
+        # forked workers keep the fake TOS client
+        multiprocessing_context="fork",
+    )
+    data, targets = zip(*loader)
+    assert [d for batch in data for d in batch] == [
+        sample(i)[0] for i in range(DATASET_SIZE)
+    ]
+    assert torch.cat(targets).tolist() == list(range(DATASET_SIZE))
+
+
+def test_getitem_with_batch_of_indices(torch_dataset):
+    expected = [sample(i) for i in (1, 2, 3)]
+    assert torch_dataset.__getitems__([1, 2, 3]) == expected
+    assert torch_dataset[[1, 2, 3]] == expected
+    assert torch_dataset[(1, 2, 3)] == expected
+
+
+def test_data_loader_with_batch_sampler(torch_dataset):
+    # how torch < 2.0 reaches the concurrent batch fetch
+    sampler = torch.utils.data.BatchSampler(
+        torch.utils.data.SequentialSampler(torch_dataset),
+        batch_size=4,
+        drop_last=False,
+    )
+    loader = torch.utils.data.DataLoader(
+        torch_dataset,
+        sampler=sampler,
+        batch_size=None,
+        # torch.utils.data.default_collate is only public from torch 1.11
+        collate_fn=torch.utils.data._utils.collate.default_collate,
+    )
+    batches = list(loader)
+    assert len(batches) == DATASET_SIZE // 4
+    data, targets = batches[1]
+    assert list(data) == [sample(i)[0] for i in range(4, 8)]
+    assert targets.tolist() == list(range(4, 8))
+
+
+def test_cache_dir_serves_later_passes(tos_client, tmp_path):
+    torch_dataset = TorchTOSDataset(
+        manifest_info(),
+        decode=decode,
+        target_transform=target_transform,
+        cache_dir=str(tmp_path),
+    )
+    indices = list(range(DATASET_SIZE))
+    assert torch_dataset.__getitems__(indices) == [sample(i) for i in indices]
+    assert sum(tos_client.requests.values()) == DATASET_SIZE
+    # a fresh process only shares the directory
+    clone = pickle.loads(pickle.dumps(torch_dataset))
+    for torch_dataset in (torch_dataset, clone):
+        assert torch_dataset.__getitems__(indices) == [sample(i) for i in indices]
+    assert sum(tos_client.requests.values()) == DATASET_SIZE
+
+
+def jpeg_bytes():
+    # a gradient compresses with visible DCT rounding, unlike a flat image
+    pixels = np.arange(32 * 48 * 3, dtype=np.uint8).reshape(32, 48, 3)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def pil_decode(raw_data):
+    return np.asarray(Image.open(io.BytesIO(raw_data)).convert("RGB"))
+
+
+def test_decode_jpeg4py_matches_pil(monkeypatch):
+    jpeg4py = pytest.importorskip("jpeg4py")
+    if tos_dataset._usable_jpeg4py(jpeg4py) is None:
+        pytest.skip("libturbojpeg is not installed")
+    monkeypatch.setattr(tos_dataset, "jpeg4py", jpeg4py)
+    torch_dataset = TorchTOSDataset(manifest_info(), return_numpy=True)
+    raw_data = jpeg_bytes()
+    decoded = torch_dataset._decode(raw_data)
+    expected = pil_decode(raw_data)
+    assert decoded.shape == expected.shape and decoded.dtype == np.uint8
+    # both use libjpeg(-turbo), only rounding of the IDCT may differ
+    assert np.abs(decoded.astype(np.int16) - expected).max() <= 2
+
+
+def test_decode_without_jpeg4py(monkeypatch):
+    monkeypatch.setattr(tos_dataset, "jpeg4py", None)
+    torch_dataset = TorchTOSDataset(manifest_info(), return_numpy=True)
+    raw_data = jpeg_bytes()
+    decoded = torch_dataset._decode(raw_data)
+    assert np.array_equal(decoded, pil_decode(raw_data))
+    # fast_collate and in-place numpy transforms need a writable array
+    assert decoded.flags.writeable
+
+
+def test_decode_returns_writable_arrays():
+    torch_dataset = TorchTOSDataset(manifest_info(), return_numpy=True)
+    buffer = io.BytesIO()
+    Image.new("RGB", (6, 4), (1, 2, 3)).save(buffer, format="PNG")
+    decoded = torch_dataset._decode(buffer.getvalue())
+    assert decoded.shape == (4, 6, 3) and decoded.dtype == np.uint8
+    assert decoded.flags.writeable
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        tensor, _ = fast_collate([(decoded, 0)])
+    assert tensor[0, :, 0, 0].tolist() == [1, 2, 3]
+
+
+def test_jpeg4py_without_libturbojpeg():
+    class JPEG:
+        def __init__(self, data):
+            raise OSError("cannot load library 'libturbojpeg.so.0'")
+
+    assert tos_dataset._usable_jpeg4py(types.SimpleNamespace(JPEG=JPEG)) is None
+    assert tos_dataset._usable_jpeg4py(None) is None
+
+
+@pytest.mark.parametrize("index", [3, np.int64(3)])
+def test_location_with_python_and_numpy_ints(torch_dataset, index):
+    assert torch_dataset._location(index) == ("bucket", "3")
+    assert torch_dataset[index] == sample(3)
+
+
+def test_data_loader_with_numpy_indices(torch_dataset):
+    # SubsetRandomSampler yields numpy ints when given a numpy array
+    sampler = torch.utils.data.SubsetRandomSampler(np.arange(5, 15))
+    loader = torch.utils.data.DataLoader(torch_dataset, batch_size=4, sampler=sampler)
+    targets = torch.cat([target for _, target in loader])
+    assert sorted(targets.tolist()) == list(range(5, 15))
+
+
+def test_arrow_storage(torch_dataset):
+    pyarrow = pytest.importorskip("pyarrow")
+    assert isinstance(torch_dataset.buckets, pyarrow.Array)
+    assert isinstance(torch_dataset.keys, pyarrow.Array)
+    for index in (3, np.int64(3)):
+        location = torch_dataset._location(index)
+        assert location == ("bucket", "3")
+        assert all(type(part) is str for part in location)
+
+
+def test_list_storage_with_pyarrow_installed(torch_dataset, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(tos_dataset, "pyarrow", None)
+        torch_dataset.set_dataset_indices(**manifest_info())
+    # e.g. a dataset pickled where pyarrow was not installed
+    assert isinstance(torch_dataset.keys, list)
+    assert torch_dataset._location(np.int64(3)) == ("bucket", "3")
@@ -1,4 +1,6 @@
 import os
+import warnings
+from types import MappingProxyType
 
 from volcengine_ml_platform.util import volce_util
 
@@ -9,22 +11,31 @@ DEFAULT_REGION = "cn-beijing"
 SERVICE_NAME = "ml_platform"
 SERVICE_VERSION = "2021-10-01"
 
-SERVICE_HOSTS = {
-    BOE_ENV: os.getenv("VOLC_SERVICE_HOST_BOE", "open-boe.volcengineapi.com"),
-    PROD_ENV: "open.volcengineapi.com",
-}
-
-TOS_REGION_ENDPOINT_URLS = {
-    BOE_ENV: {
-        "cn-north-1": "http://boe-s3-official-test.volces.com",
-        "cn-north-4": "http://boe-s3-official-test.volces.com",
+# read-only, resolved once at import
+SERVICE_HOSTS = MappingProxyType(
+    {
+        BOE_ENV: os.getenv("VOLC_SERVICE_HOST_BOE", "open-boe.volcengineapi.com"),
+        PROD_ENV: "open.volcengineapi.com",
     },
-    PROD_ENV: {
-        "cn-qingdao": volce_util.get_tos_endpoint("cn-qingdao"),
-        "cn-north-1": volce_util.get_tos_endpoint("cn-qingdao"),
-        "cn-beijing": volce_util.get_tos_endpoint("cn-beijing"),
+)
+
+TOS_REGION_ENDPOINT_URLS = MappingProxyType(
+    {
+        BOE_ENV: MappingProxyType(
+            {
+                "cn-north-1": "http://boe-s3-official-test.volces.com",
+                "cn-north-4": "http://boe-s3-official-test.volces.com",
+            },
+        ),
+        PROD_ENV: MappingProxyType(
+            {
+                "cn-qingdao": volce_util.get_tos_endpoint("cn-qingdao"),
+                "cn-north-1": volce_util.get_tos_endpoint("cn-qingdao"),
+                "cn-beijing": volce_util.get_tos_endpoint("cn-beijing"),
+            },
+        ),
     },
-}
+)
 
 PUBLIC_EXAMPLES_TOS_REGION = "cn-beijing"
 PUBLIC_EXAMPLES_TOS_BUCKET = "ml-platform-public-examples-{}".format(
@@ -42,4 +53,11 @@ MODULE_MODEL_REPO = "modelrepo"
 
 
 def get_public_examples_readonly_bucket():
+    """Deprecated, use ``PUBLIC_EXAMPLES_TOS_BUCKET`` directly"""
+    warnings.warn(
+        "get_public_examples_readonly_bucket() is deprecated, "
+        "use constant.PUBLIC_EXAMPLES_TOS_BUCKET instead",
+        DeprecationWarning,
+        stacklevel=2,
+    )
     return PUBLIC_EXAMPLES_TOS_BUCKET
@@ -1,10 +1,11 @@
 """提供数据集下载，分裂操作
 
 """
-import json
 import logging
 import os
 import shutil
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from typing import Optional
 from typing import Tuple
@@ -12,8 +13,13 @@ from typing import Tuple
 from volcengine_ml_platform import constant
 from volcengine_ml_platform.io import tos
 from volcengine_ml_platform.openapi import dataset_client
+from volcengine_ml_platform.util import json_util
 
 QUEUE_TIMEOUT_SECONDS = 4
+SPLIT_COPY_PARALLELISM = 32
+SPLIT_PIPELINE_DEPTH = 1024
+MANIFEST_WRITE_BUFFER_SIZE = 1 << 20
+MANIFEST_FLUSH_LINES = 10000
 
 
 def dataset_copy_file(metadata, source_dir, destination_dir):
@@ -42,6 +48,45 @@ def dataset_copy_file(metadata, source_dir, destination_dir):
     metadata["Data"]["FilePath"] = target_file
 
 
+class ManifestWriter:
+    """按批次写入 manifest 文件，减少写调用
+
+    Args:
+        manifest_path(str): manifest 文件路径
+
+    """
+
+    def __init__(self, manifest_path):
+        self._file = open(
+            manifest_path,
+            "wb",
+            buffering=MANIFEST_WRITE_BUFFER_SIZE,
+        )
+        self._buffer = bytearray()
+        self._count = 0
+
+    def write(self, manifest_line):
+        self._buffer += json_util.dumps(manifest_line)
+        self._buffer += b"\n"
+        self._count += 1
+        if self._count % MANIFEST_FLUSH_LINES == 0:
+            self.flush()
+
+    def flush(self):
+        self._file.write(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
 class _Dataset:
     def __init__(
         self,
@@ -114,6 +159,52 @@ class _Dataset:
             constant.DATASET_LOCAL_METADATA_FILENAME,
         )
 
+    def _split_manifest(self, training_dir, testing_dir, is_test):
+        """copy dataset files and write the manifests of a train/test split
+
+        Args:
+            training_dir(str): 训练集输出目录
+            testing_dir(str): 测试集输出目录
+            is_test(np.ndarray): bool 数组，标记 manifest 每一行是否属于测试集
+        """
+        # parsing runs in this thread while the copies of the previous lines
+        # run in the pool, results are written in manifest order
+        target_dirs = (training_dir, testing_dir)
+        mask_size = len(is_test)
+        pending = deque()
+        with ManifestWriter(
+            os.path.join(training_dir, constant.DATASET_LOCAL_METADATA_FILENAME),
+        ) as training_writer:
+            with ManifestWriter(
+                os.path.join(testing_dir, constant.DATASET_LOCAL_METADATA_FILENAME),
+            ) as testing_writer:
+                writers = (training_writer, testing_writer)
+
+                def write_oldest():
+                    future, split, manifest_line = pending.popleft()
+                    # raises copy errors, dataset_copy_file updates the FilePath
+                    future.result()
+                    writers[split].write(manifest_line)
+
+                with ThreadPoolExecutor(
+                    max_workers=SPLIT_COPY_PARALLELISM,
+                ) as executor:
+                    with open(self._manifest_path(), "rb") as f:
+                        for index, line in enumerate(f):
+                            manifest_line = json_util.loads(line)
+                            split = int(index < mask_size and is_test[index])
+                            future = executor.submit(
+                                dataset_copy_file,
+                                manifest_line,
+                                self.local_path,
+                                target_dirs[split],
+                            )
+                            pending.append((future, split, manifest_line))
+                            if len(pending) >= SPLIT_PIPELINE_DEPTH:
+                                write_oldest()
+                    while pending:
+                        write_oldest()
+
     def _download_file(self, tos_url: str, file_path: str):
         return self.tos_client.download_file(
             tos_url=tos_url, target_file_path=file_path
@@ -151,9 +242,9 @@ class _Dataset:
         )
         manifest_line = []
         urls = []
-        with open(manifest_file_path, encoding="utf-8") as f:
-            for seqNum, line in enumerate(f.readlines()):
-                manifest_line.append(json.loads(line))
+        with open(manifest_file_path, "rb") as f:
+            for seqNum, line in enumerate(f):
+                manifest_line.append(json_util.loads(line))
                 urls.append(manifest_line[seqNum]["Data"][manifest_keyword])
                 if limit != -1 and seqNum + 1 >= limit:
                     break
@@ -167,16 +258,10 @@ class _Dataset:
 
         # create a new thread to consume new local maifest file
         print("Generating the local mainfest file...")
-        manifest_str = ""
-        for idx, path in enumerate(paths):
-            manifest_line[idx]["Data"]["FilePath"] = path
-            manifest_str += json.dumps(manifest_line[idx]) + "\n"
-        with open(
-            self._manifest_path(),
-            "w",
-            encoding="utf-8",
-        ) as new_manifest_file:
-            new_manifest_file.write(manifest_str)
+        with ManifestWriter(self._manifest_path()) as new_manifest_file:
+            for idx, path in enumerate(paths):
+                manifest_line[idx]["Data"]["FilePath"] = path
+                new_manifest_file.write(manifest_line[idx])
         print("Update the local mainfest file successful")
         self.created = True
 
@@ -196,9 +281,9 @@ class _Dataset:
         paths = []
         annotations = []
 
-        with open(self._manifest_path(), encoding="utf-8") as f:
+        with open(self._manifest_path(), "rb") as f:
             for i, line in enumerate(f):
-                manifest_line = json.loads(line)
+                manifest_line = json_util.loads(line)
                 if i < offset:
                     continue
                 if limit != -1 and i >= offset + limit:
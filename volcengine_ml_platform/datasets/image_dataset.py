@@ -1,16 +1,20 @@
-import json
 import math
 import os
+import re
+import sys
 from collections.abc import Callable
 from typing import Optional
+from typing import Tuple
 
 import numpy as np
 from PIL import Image
 
-from volcengine_ml_platform import constant
 from volcengine_ml_platform.datasets.dataset import _Dataset
-from volcengine_ml_platform.datasets.dataset import dataset_copy_file
 from volcengine_ml_platform.io.tos_dataset import TorchTOSDataset
+from volcengine_ml_platform.util import json_util
+
+# scheme://bucket/key
+_URL_RE = re.compile(r"//([^/]+)/(.*)")
 
 
 class ImageDataset(_Dataset):
@@ -75,13 +79,14 @@ class ImageDataset(_Dataset):
         line_count = self.data_count
 
         np.random.seed(random_state)
-        test_index_set = set(
+        is_test = np.zeros(line_count, dtype=np.bool_)
+        is_test[
             np.random.choice(
                 line_count,
                 math.floor(line_count * (1 - ratio)),
                 replace=False,
-            ),
-        )
+            )
+        ] = True
         os.makedirs(testing_dir, exist_ok=True)
         os.makedirs(training_dir, exist_ok=True)
 
@@ -92,45 +97,7 @@ class ImageDataset(_Dataset):
         train_dataset.data_count = line_count - test_dataset.data_count
 
         # generate training and testing datasets's manifest file
-        train_metadata_path = os.path.join(
-            training_dir,
-            constant.DATASET_LOCAL_METADATA_FILENAME,
-        )
-        test_metadata_path = os.path.join(
-            testing_dir,
-            constant.DATASET_LOCAL_METADATA_FILENAME,
-        )
-        with open(
-            test_metadata_path,
-            mode="w",
-            encoding="utf-8",
-        ) as testing_manifest_file:
-            with open(
-                train_metadata_path,
-                mode="w",
-                encoding="utf-8",
-            ) as training_manifest_file:
-                index = 0
-                with open(self._manifest_path(), encoding="utf-8") as f:
-                    for line in f:
-                        manifest_line = json.loads(line)
-                        if index in test_index_set:
-                            dataset_copy_file(
-                                manifest_line,
-                                self.local_path,
-                                testing_dir,
-                            )
-                            json.dump(manifest_line, testing_manifest_file)
-                            testing_manifest_file.write("\n")
-                        else:
-                            dataset_copy_file(
-                                manifest_line,
-                                self.local_path,
-                                training_dir,
-                            )
-                            json.dump(manifest_line, training_manifest_file)
-                            training_manifest_file.write("\n")
-                        index = index + 1
+        self._split_manifest(training_dir, testing_dir, is_test)
 
         train_dataset.created = True
         test_dataset.created = True
@@ -147,32 +114,69 @@ class ImageDataset(_Dataset):
             np array of images
             list of annotations
         """
-        images = []
+        file_paths = []
         annotations = []
 
-        with open(self._manifest_path(), encoding="utf-8") as f:
+        with open(self._manifest_path(), "rb") as f:
             for i, line in enumerate(f):
-                manifest_line = json.loads(line)
                 if i < offset:
                     continue
                 if limit != -1 and i >= offset + limit:
                     break
-                file_path = manifest_line["Data"]["FilePath"]
-                image = Image.open(file_path)
-                images.append(np.asarray(image))
+                manifest_line = json_util.loads(line)
+                file_paths.append(manifest_line["Data"]["FilePath"])
                 annotations.append(manifest_line["Annotation"])
 
-        return np.array(images), annotations
+        # decode into one preallocated buffer shaped after the first image,
+        # instead of keeping every image in a list and copying them again
+        images = None
+        heterogeneous_images = None
+        for i, file_path in enumerate(file_paths):
+            with Image.open(file_path) as image:
+                image_array = np.asarray(image)
+            if heterogeneous_images is not None:
+                heterogeneous_images.append(image_array)
+            elif images is None:
+                images = np.empty(
+                    (len(file_paths), *image_array.shape),
+                    dtype=image_array.dtype,
+                )
+                images[0] = image_array
+            elif (
+                image_array.shape == images.shape[1:]
+                and image_array.dtype == images.dtype
+            ):
+                images[i] = image_array
+            else:
+                # images of different shapes can not share one buffer, copy the
+                # decoded ones out so the buffer can be freed
+                heterogeneous_images = [a.copy() for a in images[:i]]
+                heterogeneous_images.append(image_array)
+                images = None
+
+        if heterogeneous_images is not None:
+            # numpy no longer infers object arrays from ragged sequences
+            images = np.empty(len(heterogeneous_images), dtype=object)
+            for i, image_array in enumerate(heterogeneous_images):
+                images[i] = image_array
+            return images, annotations
+        if images is None:
+            return np.array([]), annotations
+        return images, annotations
 
     def parse_image_manifest(self, manifest_file_path):
         # parse manifest
         manifest_info = {"buckets": [], "keys": [], "annotations": []}
-        with open(manifest_file_path, encoding="utf-8") as f:
+        with open(manifest_file_path, "rb") as f:
             for _, line in enumerate(f):
-                manifest_line = json.loads(line)
+                manifest_line = json_util.loads(line)
                 url = manifest_line["Data"]["ImageURL"]
-                bucket = url.split("//")[1].split("/")[0]
-                key = url.split(f"{bucket}/")[1]
+                m = _URL_RE.search(url)
+                if m is None:
+                    raise ValueError(f"invalid image url: {url}")
+                bucket, key = m.group(1, 2)
+                # share one string object per distinct bucket
+                bucket = sys.intern(bucket)
                 manifest_info["buckets"].append(bucket)
                 manifest_info["keys"].append(key)
                 manifest_info["annotations"].append(
@@ -184,12 +188,20 @@ class ImageDataset(_Dataset):
         self,
         transform: Optional[Callable] = None,
         target_transform: Optional[Callable] = None,
+        return_numpy: bool = False,
+        draft_size: Optional[Tuple[int, int]] = None,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: Optional[int] = None,
     ):
         manifest_info = self.get_manifest_info(self.parse_image_manifest)
         torch_dataset = TorchTOSDataset(
             manifest_info=manifest_info,
             transform=transform,
             target_transform=target_transform,
+            return_numpy=return_numpy,
+            draft_size=draft_size,
+            cache_dir=cache_dir,
+            cache_max_bytes=cache_max_bytes,
         )
 
         return torch_dataset
@@ -1,12 +1,9 @@
-import json
 import math
 import os
 
 import numpy as np
 
-from volcengine_ml_platform import constant
 from volcengine_ml_platform.datasets.dataset import _Dataset
-from volcengine_ml_platform.datasets.dataset import dataset_copy_file
 
 
 class VideoDataset(_Dataset):
@@ -65,13 +62,14 @@ class VideoDataset(_Dataset):
         line_count = self.data_count
 
         np.random.seed(random_state)
-        test_index_set = set(
+        is_test = np.zeros(line_count, dtype=np.bool_)
+        is_test[
             np.random.choice(
                 line_count,
                 math.floor(line_count * (1 - ratio)),
                 replace=False,
-            ),
-        )
+            )
+        ] = True
         os.makedirs(testing_dir, exist_ok=True)
         os.makedirs(training_dir, exist_ok=True)
 
@@ -82,45 +80,7 @@ class VideoDataset(_Dataset):
         train_dataset.data_count = line_count - test_dataset.data_count
 
         # generate training and testing datasets's manifest file
-        train_metadata_path = os.path.join(
-            training_dir,
-            constant.DATASET_LOCAL_METADATA_FILENAME,
-        )
-        test_metadata_path = os.path.join(
-            testing_dir,
-            constant.DATASET_LOCAL_METADATA_FILENAME,
-        )
-        with open(
-            test_metadata_path,
-            mode="w",
-            encoding="utf-8",
-        ) as testing_manifest_file:
-            with open(
-                train_metadata_path,
-                mode="w",
-                encoding="utf-8",
-            ) as training_manifest_file:
-                index = 0
-                with open(self._manifest_path(), encoding="utf-8") as f:
-                    for line in f:
-                        manifest_line = json.loads(line)
-                        if index in test_index_set:
-                            dataset_copy_file(
-                                manifest_line,
-                                self.local_path,
-                                testing_dir,
-                            )
-                            json.dump(manifest_line, testing_manifest_file)
-                            testing_manifest_file.write("\n")
-                        else:
-                            dataset_copy_file(
-                                manifest_line,
-                                self.local_path,
-                                training_dir,
-                            )
-                            json.dump(manifest_line, training_manifest_file)
-                            training_manifest_file.write("\n")
-                        index = index + 1
+        self._split_manifest(training_dir, testing_dir, is_test)
 
         train_dataset.created = True
         test_dataset.created = True
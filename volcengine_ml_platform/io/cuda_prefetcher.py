@@ -0,0 +1,94 @@
+"""overlap host to device copies of DataLoader batches with GPU compute"""
+from typing import Optional
+from typing import Sequence
+
+import torch
+
+
+class CudaPrefetcher:
+    """
+    包装一个 ``torch.utils.data.DataLoader``，在独立的 CUDA stream 上提前把下一个 batch
+    拷贝到 GPU 并做归一化，使 H2D 拷贝与当前 batch 的计算重叠
+
+    DataLoader 需要设置 ``pin_memory=True``，一般与 ``fast_collate`` 一起使用::
+
+        loader = DataLoader(ds, collate_fn=fast_collate, pin_memory=True)
+        for images, targets in CudaPrefetcher(loader, mean, std):
+            ...
+
+    CPU 端的 transform 不需要再做 ``ToTensor`` 与 ``Normalize``，图片保持 uint8，
+    H2D 的数据量只有 float32 的 1/4
+
+    Args:
+        loader(Iterable): 产出 (uint8 NCHW tensor, target tensor) 的 DataLoader
+        mean(Sequence[float], None): 每个通道的均值，取值范围 [0, 1]
+        std(Sequence[float], None): 每个通道的标准差，取值范围 [0, 1]
+        device(str, torch.device): 目标 GPU，默认为当前 GPU
+        normalize_on_device(bool): 是否在 GPU 上转为 float 并归一化，为 False 时
+            batch 原样拷贝到 GPU
+
+    """
+
+    def __init__(
+        self,
+        loader,
+        mean: Optional[Sequence[float]] = None,
+        std: Optional[Sequence[float]] = None,
+        device="cuda",
+        normalize_on_device: bool = True,
+    ):
+        self.loader = loader
+        self.device = torch.device(device)
+        self.stream = torch.cuda.Stream(self.device)
+        self.normalize_on_device = normalize_on_device
+        self.mean = None
+        self.std = None
+        if normalize_on_device:
+            if mean is None or std is None:
+                raise ValueError("mean and std are required to normalize on device")
+            # inputs stay uint8 on host, so scale the statistics to [0, 255]
+            self.mean = torch.tensor(
+                [m * 255 for m in mean], device=self.device
+            ).view(1, -1, 1, 1)
+            self.std = torch.tensor(
+                [s * 255 for s in std], device=self.device
+            ).view(1, -1, 1, 1)
+        self._iter = None
+        self.next_input = None
+        self.next_target = None
+
+    def __len__(self):
+        return len(self.loader)
+
+    def __iter__(self):
+        self._iter = iter(self.loader)
+        self.preload()
+        return self
+
+    def preload(self):
+        try:
+            next_input, next_target = next(self._iter)
+        except StopIteration:
+            self.next_input = None
+            self.next_target = None
+            return
+        with torch.cuda.stream(self.stream):
+            next_input = next_input.to(self.device, non_blocking=True)
+            next_target = next_target.to(self.device, non_blocking=True)
+            if self.normalize_on_device:
+                next_input = next_input.float().sub_(self.mean).div_(self.std)
+        self.next_input = next_input
+        self.next_target = next_target
+
+    def __next__(self):
+        current_stream = torch.cuda.current_stream(self.device)
+        current_stream.wait_stream(self.stream)
+        next_input, next_target = self.next_input, self.next_target
+        if next_input is None:
+            raise StopIteration
+        # the tensors were allocated on the prefetch stream but are used on
+        # the current one, keep the caching allocator from reusing them early
+        next_input.record_stream(current_stream)
+        next_target.record_stream(current_stream)
+        self.preload()
+        return next_input, next_target
@@ -0,0 +1,148 @@
+"""本地磁盘上的 TOS 对象缓存，使后续 epoch 不必重复下载同一对象"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Optional
+
+# scan for eviction after writing this fraction of max_bytes
+EVICT_WRITE_FRACTION = 16
+# when evicting, shrink the cache to this fraction of max_bytes
+EVICT_TARGET_RATIO = 0.9
+# temporary files older than this were left by a crashed writer
+STALE_TMP_SECONDS = 3600
+# root may be shared with other files, only these names are owned by the cache
+_SUBDIR_RE = re.compile(r"[0-9a-f]{2}")
+_ENTRY_RE = re.compile(r"([0-9a-f]{40})(\.[0-9a-f]{32}\.tmp)?")
+
+
+class DiskCache:
+    """
+    以 sha1(bucket/key) 为文件名，分 256 个子目录存放对象内容，多个进程可以共享同一目录。
+    淘汰时只会删除符合这一命名方式的文件，目录中的其他文件不受影响
+
+    Args:
+        root(str): 缓存目录
+        max_bytes(int, None): 缓存大小上限，超出后由后台线程按最近访问时间淘汰，
+            None 表示不限制
+
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._written = 0
+        self._lock = threading.Lock()
+        self._evict_event = threading.Event()
+        self._evict_thread = None
+
+    def _path(self, bucket, key):
+        digest = hashlib.sha1(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], digest)
+
+    def get(self, bucket, key) -> Optional[bytes]:
+        """return the cached object, or None on a miss"""
+        path = self._path(bucket, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning("read cache %s/%s failed, error: %s", bucket, key, e)
+            return None
+        try:
+            # mtime tracks the last access for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, bucket, key, data: bytes):
+        """store an object, readers never see a partially written file"""
+        path = self._path(bucket, key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning("cache %s/%s failed, error: %s", bucket, key, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        if self.max_bytes is not None:
+            self._record_write(len(data))
+
+    def _record_write(self, size):
+        with self._lock:
+            self._written += size
+            if self._written < self.max_bytes // EVICT_WRITE_FRACTION:
+                return
+            self._written = 0
+            if self._evict_thread is None:
+                self._evict_thread = threading.Thread(
+                    target=self._evict_loop,
+                    daemon=True,
+                )
+                self._evict_thread.start()
+        self._evict_event.set()
+
+    def _evict_loop(self):
+        while True:
+            self._evict_event.wait()
+            self._evict_event.clear()
+            try:
+                self.evict()
+            except OSError as e:
+                logging.warning("evict cache %s failed, error: %s", self.root, e)
+
+    def evict(self):
+        """delete least recently used files until the cache fits in max_bytes"""
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        stale_before = time.time() - STALE_TMP_SECONDS
+        for dir_entry in os.scandir(self.root):
+            if not _SUBDIR_RE.fullmatch(dir_entry.name) or not dir_entry.is_dir():
+                continue
+            for file_entry in os.scandir(dir_entry.path):
+                m = _ENTRY_RE.fullmatch(file_entry.name)
+                if m is None or not m.group(1).startswith(dir_entry.name):
+                    continue
+                try:
+                    stat = file_entry.stat()
+                except FileNotFoundError:
+                    continue
+                if m.group(2) is not None:
+                    # in-flight writes are recent, old ones are leftovers
+                    if stat.st_mtime < stale_before:
+                        _remove(file_entry.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file_entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * EVICT_TARGET_RATIO
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            _remove(path)
+            total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        # removed by another process sharing the cache
+        pass
@@ -0,0 +1,60 @@
+"""uint8 batch collation for :class:`TorchTOSDataset`, adapted from timm
+
+Usage::
+
+    dataset = image_dataset.init_torch_dataset(return_numpy=True)
+    loader = DataLoader(dataset, collate_fn=fast_collate, pin_memory=True)
+
+Images stay uint8 until they reach the GPU, normalization is expected to be
+done on device.
+"""
+import numpy as np
+import torch
+
+
+def _to_chw_tensor(image):
+    if isinstance(image, np.ndarray):
+        # numpy images are HWC as decoded by TorchTOSDataset
+        if image.ndim == 2:
+            image = image[:, :, None]
+        return torch.from_numpy(image).permute(2, 0, 1)
+    # tensors are CHW as produced by torchvision
+    return image
+
+
+def fast_collate(batch):
+    """collate (image, int label) samples into a uint8 NCHW tensor and int64 labels
+
+    Args:
+        batch(list): samples, images are HWC ``np.ndarray`` or CHW ``torch.Tensor``
+
+    Returns:
+        uint8 tensor of shape (N, C, H, W), int64 tensor of shape (N,)
+    """
+    assert isinstance(batch[0], tuple)
+    batch_size = len(batch)
+    if isinstance(batch[0][0], tuple):
+        # This branch 'deinterleaves' and flattens tuples of input tensors into one
+        # tensor ordered by position such that all tuple of position n will end up
+        # in a torch.split(tensor, batch_size) in nth position
+        inner_tuple_size = len(batch[0][0])
+        flattened_batch_size = batch_size * inner_tuple_size
+        targets = torch.zeros(flattened_batch_size, dtype=torch.int64)
+        first = _to_chw_tensor(batch[0][0][0])
+        tensor = torch.zeros((flattened_batch_size, *first.shape), dtype=torch.uint8)
+        for i in range(batch_size):
+            # all input tensor tuples must be same length
+            assert len(batch[i][0]) == inner_tuple_size
+            for j in range(inner_tuple_size):
+                targets[i + j * batch_size] = batch[i][1]
+                tensor[i + j * batch_size].copy_(_to_chw_tensor(batch[i][0][j]))
+        return tensor, targets
+    if isinstance(batch[0][0], (np.ndarray, torch.Tensor)):
+        targets = torch.tensor([b[1] for b in batch], dtype=torch.int64)
+        assert len(targets) == batch_size
+        first = _to_chw_tensor(batch[0][0])
+        tensor = torch.zeros((batch_size, *first.shape), dtype=torch.uint8)
+        for i in range(batch_size):
+            tensor[i].copy_(_to_chw_tensor(batch[i][0]))
+        return tensor, targets
+    raise TypeError(f"unsupported sample type: {type(batch[0][0])}")
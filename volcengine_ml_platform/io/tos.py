@@ -11,6 +11,7 @@ from urllib.parse import urlparse
 import boto3
 import botocore
 from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from tqdm import tqdm
 
@@ -20,8 +21,20 @@ import volcengine_ml_platform
 class TOSClient:
     """自动配置环境变量中的用户信息，与TOS 进行交互"""
 
-    def __init__(self, credentials=None, session_token=None):
-        """设置认证信息，初始化类变量"""
+    def __init__(
+        self,
+        credentials=None,
+        session_token=None,
+        max_pool_connections=None,
+    ):
+        """设置认证信息，初始化类变量
+
+        Args:
+            credentials(Credentials, None): 认证信息，默认从环境中读取
+            session_token(str, None): STS token
+            max_pool_connections(int, None): HTTP 连接池大小，默认为 botocore 的 10，
+                多线程并发访问时应不小于线程数
+        """
 
         # ref: https://boto3.amazonaws.com/v1/documentation/api/latest/guide/configuration.html
         if credentials is None:
@@ -37,6 +50,8 @@ class TOSClient:
             session_token = volcengine_ml_platform.get_session_token()
         if session_token is not None and len(session_token.strip()) > 0:
             config["aws_session_token"] = session_token
+        if max_pool_connections is not None:
+            config["config"] = Config(max_pool_connections=max_pool_connections)
         self.s3_client = boto3.client("s3", **config)
         self.dir_record = set()
 
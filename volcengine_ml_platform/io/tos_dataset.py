@@ -1,60 +1,340 @@
 import io
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from typing import Dict
 from typing import Optional
+from typing import Tuple
 
+import numpy as np
 import torch
 from PIL import Image
 
 from volcengine_ml_platform.io import tos
+from volcengine_ml_platform.io.disk_cache import DiskCache
+
+try:
+    import jpeg4py
+except ImportError:
+    jpeg4py = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+DEFAULT_FETCH_THREADS = 32
+DEFAULT_PREFETCH_SIZE = 64
+TOS_POOL_CONNECTIONS = 64
+JPEG_MAGIC = b"\xff\xd8\xff"
+# recreated by _init_process_resources in every process
+PROCESS_LOCAL_ATTRS = ("_pid", "_pool", "tos_client", "_disk_cache")
+
+
+def _usable_jpeg4py(module):
+    """return module if it can decode, jpeg4py loads libturbojpeg on first use"""
+    if module is None:
+        return None
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buffer, format="JPEG")
+    try:
+        module.JPEG(np.frombuffer(buffer.getvalue(), np.uint8)).decode()
+    except Exception as e:
+        logging.warning("jpeg4py is not usable, decode with PIL, error: %s", e)
+        return None
+    return module
+
+
+jpeg4py = _usable_jpeg4py(jpeg4py)
+
+
+class PrefetchSampler(torch.utils.data.Sampler):
+    """
+    包装一个 sampler，记录当前 epoch 的采样顺序，使 ``TorchTOSDataset`` 可以预取后续样本
+
+    sampler 的迭代进度只在迭代它的进程中可见，因此只在 ``num_workers=0`` 时生效
+
+    Args:
+        sampler(Sampler): 被包装的 sampler
+
+    """
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+        self._indices = []
+        self._position = 0
+        self._generation = 0
+
+    def __iter__(self):
+        self._indices = list(self.sampler)
+        self._position = 0
+        self._generation += 1
+        for index in self._indices:
+            self._position += 1
+            yield index
+
+    def __len__(self):
+        return len(self.sampler)
+
+    def set_epoch(self, epoch):
+        self.sampler.set_epoch(epoch)
+
+    @property
+    def position(self):
+        """number of indices sampled so far in the current epoch"""
+        return self._position
+
+    @property
+    def generation(self):
+        """incremented every time a new epoch starts"""
+        return self._generation
+
+    def indices(self, start, stop):
+        """return the indices at positions [start, stop) of the current epoch"""
+        return self._indices[start:stop]
+
+    def peek(self, k):
+        """return up to k indices that will be sampled next"""
+        return self.indices(self._position, self._position + k)
 
 
 class TorchTOSDataset:
+    """
+    从 TOS 读取图片的 pytorch 数据集，一般通过 ``ImageDataset.init_torch_dataset`` 创建
+
+    一个 batch 的样本会用 ``fetch_threads`` 个线程并发拉取。torch >= 2.0 的 DataLoader
+    会自动调用 ``__getitems__``；更早的版本（如 torch 1.8）需要让 sampler 直接产出 batch，
+    ``__getitem__`` 收到下标列表时整批并发拉取::
+
+        loader = DataLoader(
+            dataset,
+            sampler=BatchSampler(RandomSampler(dataset), batch_size, drop_last=True),
+            batch_size=None,
+            collate_fn=default_collate,  # 或 fast_collate
+        )
+
+    Args:
+        manifest_info(dict): ``buckets``, ``keys`` 与 ``annotations`` 三个等长列表
+        decode(Callable, None): 自定义解码函数，输入为对象的原始 bytes
+        transform(Callable, None): 对解码后的图片做变换
+        target_transform(Callable, None): 对标注做变换
+        fetch_threads(int): ``__getitems__`` 并发拉取的线程数
+        return_numpy(bool): 默认解码返回 uint8 HWC ``np.ndarray`` 而不是 PIL Image，
+            配合 ``volcengine_ml_platform.io.fast_collate.fast_collate`` 使用
+        draft_size(Tuple[int, int], None): transform 会把图片缩小时，设置为不小于缩放目标
+            的 (宽, 高)，例如 resize 到 224 时设为 (256, 256)。JPEG 会在 DCT 域直接以
+            1/2、1/4 或 1/8 分辨率解码
+        cache_dir(str, None): 设置后把读取的对象缓存在本地磁盘，后续 epoch 直接读本地文件，
+            默认不缓存
+        cache_max_bytes(int, None): 磁盘缓存大小上限，None 表示不限制
+
+    """
+
     def __init__(
         self,
         manifest_info: Dict,
         decode: Optional[Callable] = None,
         transform: Optional[Callable] = None,
         target_transform: Optional[Callable] = None,
+        fetch_threads: int = DEFAULT_FETCH_THREADS,
+        return_numpy: bool = False,
+        draft_size: Optional[Tuple[int, int]] = None,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: Optional[int] = None,
     ):
         self.decode = decode
         self.transform = transform
         self.target_transform = target_transform
+        self.fetch_threads = fetch_threads
+        self.return_numpy = return_numpy
+        self.draft_size = draft_size
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
         buckets = manifest_info["buckets"]
         keys = manifest_info["keys"]
         annotations = manifest_info["annotations"]
         assert buckets is not None and keys is not None and annotations is not None
         assert len(buckets) == len(keys) and len(buckets) == len(annotations)
         self.set_dataset_indices(buckets, keys, annotations)
+        self.prefetch_sampler = None
+        self.prefetch_size = DEFAULT_PREFETCH_SIZE
+        # per-process resources are created on first use in every process
+        self._pid = None
 
     def set_dataset_indices(self, buckets, keys, annotations):
+        if pyarrow is not None:
+            # contiguous string storage instead of one python object per row,
+            # there are only a handful of distinct buckets
+            buckets = pyarrow.array(buckets, type=pyarrow.string()).dictionary_encode()
+            keys = pyarrow.array(keys, type=pyarrow.string())
         self.buckets = buckets
         self.keys = keys
         self.annotations = annotations
 
+    def _location(self, index):
+        bucket, key = self.buckets[index], self.keys[index]
+        # check the storage, not the import, buckets and keys may also be lists
+        if pyarrow is not None and isinstance(self.keys, pyarrow.Array):
+            return bucket.as_py(), key.as_py()
+        return bucket, key
+
+    def set_prefetch_sampler(
+        self,
+        sampler: PrefetchSampler,
+        prefetch_size: int = DEFAULT_PREFETCH_SIZE,
+    ):
+        """在后台线程中预取 sampler 接下来的 prefetch_size 个对象
+
+        Args:
+            sampler(PrefetchSampler): 传给 DataLoader 的 sampler
+            prefetch_size(int): 预取的样本数，也是缓存的容量，一般设为
+                ``prefetch_factor * batch_size``
+        """
+        self.prefetch_sampler = sampler
+        self.prefetch_size = prefetch_size
+
     def __len__(self):
         return len(self.buckets)
 
+    def __getstate__(self):
+        # thread pools and clients can not be pickled to worker processes
+        state = self.__dict__.copy()
+        for name in list(state):
+            if name in PROCESS_LOCAL_ATTRS or name.startswith("_prefetch_"):
+                del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._pid = None
+
+    def _ensure_process_resources(self):
+        # clients, connections and threads do not survive a fork
+        if self._pid != os.getpid():
+            self._init_process_resources()
+
+    def _init_process_resources(self):
+        """create the per-process TOS client and fetch thread pool"""
+        self._pid = os.getpid()
+        # one connection per fetch thread plus the prefetch thread
+        self.tos_client = tos.TOSClient(
+            max_pool_connections=max(TOS_POOL_CONNECTIONS, self.fetch_threads + 1),
+        )
+        self._pool = ThreadPoolExecutor(max_workers=self.fetch_threads)
+        # prefetch state is shared by all fetch threads, the thread itself is
+        # only started once a prefetch sampler is used
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_queue = queue.Queue()
+        self._prefetch_cache = OrderedDict()
+        self._prefetch_generation = None
+        self._prefetch_queued_until = 0
+        self._prefetch_thread = None
+        self._disk_cache = None
+        if self.cache_dir is not None:
+            self._disk_cache = DiskCache(self.cache_dir, self.cache_max_bytes)
+
     def _decode(self, raw_data):
-        return Image.open(io.BytesIO(raw_data)).convert("RGB")
+        # draft decoding is cheaper than a full resolution jpeg4py decode
+        if (
+            self.draft_size is None
+            and jpeg4py is not None
+            and raw_data[:3] == JPEG_MAGIC
+        ):
+            # libjpeg-turbo decodes straight into RGB, no extra convert pass
+            try:
+                rgb = jpeg4py.JPEG(np.frombuffer(raw_data, np.uint8)).decode()
+                return rgb if self.return_numpy else Image.fromarray(rgb)
+            except jpeg4py.JPEGRuntimeError:
+                pass
+        image = Image.open(io.BytesIO(raw_data))
+        if self.draft_size is not None:
+            image.draft("RGB", self.draft_size)
+        image = image.convert("RGB")
+        if self.return_numpy:
+            # np.asarray would be a read-only view, jpeg4py arrays are writable
+            return np.array(image, dtype=np.uint8)
+        return image
 
     def _target_transform(self, target):
         target = int(target["Result"][0]["Data"][0]["Label"])
         return target
 
-    def __getitem__(self, index):
-        torch.set_num_threads(1)
-        # get each process a TOS client
-        if not hasattr(self, "tos_client"):
-            self.tos_client = tos.TOSClient()
-        bucket, key, annotation = (
-            self.buckets[index],
-            self.keys[index],
-            self.annotations[index],
-        )
-        rsp = self.tos_client.get_object(bucket=bucket, key=key)
-        data = rsp.read()
-        rsp.close()
+    def _get_object(self, bucket, key):
+        if self._disk_cache is not None:
+            data = self._disk_cache.get(bucket, key)
+            if data is not None:
+                return data
+        # release the connection back to the pool even if the read fails
+        with closing(self.tos_client.get_object(bucket=bucket, key=key)) as rsp:
+            data = rsp.read()
+        if self._disk_cache is not None:
+            self._disk_cache.put(bucket, key, data)
+        return data
+
+    def _start_prefetch(self):
+        # fetch threads race here on the first batch
+        with self._prefetch_lock:
+            if self._prefetch_thread is not None:
+                return
+            self._prefetch_thread = threading.Thread(
+                target=self._prefetch_loop,
+                daemon=True,
+            )
+            self._prefetch_thread.start()
+
+    def _prefetch_loop(self):
+        while True:
+            location = self._prefetch_queue.get()
+            try:
+                data = self._get_object(*location)
+            except Exception as e:
+                # the sample is fetched again on access
+                logging.warning("prefetch %s failed, error: %s", location, e)
+                continue
+            else:
+                with self._prefetch_lock:
+                    self._prefetch_cache[location] = data
+                    if len(self._prefetch_cache) > self.prefetch_size:
+                        self._prefetch_cache.popitem(last=False)
+            finally:
+                # lets callers wait with _prefetch_queue.join()
+                self._prefetch_queue.task_done()
+
+    def _schedule_prefetch(self):
+        sampler = self.prefetch_sampler
+        with self._prefetch_lock:
+            if sampler.generation != self._prefetch_generation:
+                # a new epoch restarts the sampling order
+                self._prefetch_generation = sampler.generation
+                self._prefetch_queued_until = 0
+            start = max(sampler.position, self._prefetch_queued_until)
+            upcoming = sampler.indices(start, sampler.position + self.prefetch_size)
+            self._prefetch_queued_until = start + len(upcoming)
+        # only indices that were never queued, resolved outside of the lock
+        for index in upcoming:
+            self._prefetch_queue.put(self._location(index))
+
+    def _read_object(self, bucket, key):
+        if self.prefetch_sampler is None:
+            return self._get_object(bucket, key)
+        if self._prefetch_thread is None:
+            self._start_prefetch()
+        with self._prefetch_lock:
+            data = self._prefetch_cache.pop((bucket, key), None)
+        self._schedule_prefetch()
+        if data is None:
+            data = self._get_object(bucket, key)
+        return data
+
+    def _fetch_one(self, index):
+        bucket, key = self._location(index)
+        annotation = self.annotations[index]
+        data = self._read_object(bucket, key)
         if self.decode is not None:
             data = self.decode(data)
         else:
@@ -66,3 +346,19 @@ class TorchTOSDataset:
         else:
             annotation = self._target_transform(annotation)
         return data, annotation
+
+    def __getitem__(self, index):
+        # a batch of indices, see the class docstring
+        if isinstance(index, (list, tuple)):
+            return self.__getitems__(index)
+        self._ensure_process_resources()
+        return self._fetch_one(index)
+
+    def __getitems__(self, indices):
+        """fetch a whole batch of samples concurrently
+
+        Used by ``torch.utils.data.DataLoader`` when the dataset defines it, so
+        the TOS requests and decoding of one batch overlap with each other.
+        """
+        self._ensure_process_resources()
+        return list(self._pool.map(self._fetch_one, indices))
@@ -0,0 +1,40 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _NonFiniteFloat(float):
+    """NaN or Infinity read by :func:`loads`
+
+    orjson would write these as null, it refuses float subclasses instead, so
+    :func:`dumps` falls back to json which writes the original constant back
+    """
+
+
+def loads(data):
+    """parse a json document from str or bytes, using orjson when installed
+
+    Documents orjson rejects, such as ones containing NaN or Infinity, are parsed
+    with json. Note that orjson parses integers beyond the 64 bit range as float
+    without raising, so those lose precision.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data, parse_constant=_NonFiniteFloat)
+
+
+def dumps(obj) -> bytes:
+    """serialize obj to compact utf-8 encoded json bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # integers beyond 64 bit and the NaN or Infinity read by loads
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")